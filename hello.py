@@ -1,15 +1,39 @@
 import streamlit as st
 import pandas as pd
-import glob
+import numpy as np
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import json
+
+
+# Colonnes utilisées par le dashboard (projection à la lecture du Parquet)
+COLUMNS = [
+    "season",
+    "date",
+    "home_team_full_name",
+    "visitor_team_full_name",
+    "home_team_score",
+    "visitor_team_score",
+]
+
+
+@st.cache_data
+def load_meta():
+    # Saisons et équipes disponibles, écrites par scripts/validate.py
+    with open("data/clean/_meta.json", "r", encoding="utf-8") as f:
+        return json.load(f)
 
 
 @st.cache_data
-def load_data():
-    all_files = glob.glob("data/clean/games_*clean.parquet")
-    dfs = [pd.read_parquet(files) for files in all_files]
-    return pd.concat(dfs, ignore_index=True)
+def load_data(season_tuple, team):
+    # Table longue partitionnée par équipe : seule la partition de l'équipe
+    # sélectionnée est lue, et les saisons sont filtrées à la lecture du Parquet.
+    # Le résultat ne contient donc que les matchs filtrés, sans autre filtrage.
+    expr = (pc.field("team") == team) & pc.field("season").isin(list(season_tuple))
+    dataset = ds.dataset("data/clean/team_games_long", format="parquet", partitioning="hive")
+    table = dataset.to_table(columns=COLUMNS, filter=expr)
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
 
-df = load_data()
 
 st.title("Dashboard NBA")
 
@@ -18,8 +42,10 @@ tab_resume, tab_details = st.tabs(["Résumé", "Détails des matchs"])
 # Sidebar Filter
 st.sidebar.header("Filtre")
 
+meta = load_meta()
+
 # Filtre par saison
-all_season = sorted(df["season"].unique())
+all_season = meta["seasons"]
 selected_season = st.sidebar.multiselect(
     "Saison :", 
     all_season, 
@@ -27,26 +53,21 @@ selected_season = st.sidebar.multiselect(
 )
 
 # Filtre par équipe
-all_team = sorted(df["home_team_full_name"].unique())
+all_team = meta["teams"]
 selected_team = st.sidebar.selectbox(
     "Équipe :",
     all_team
 )
 
-# Appliquer les filtres
-filtered = df.copy()
-
-if selected_season:
-    filtered = filtered[filtered["season"].isin(selected_season)]
+# Seules les saisons sélectionnées sont lues (toutes si aucune sélection)
+season_tuple = tuple(selected_season or all_season)
+df = load_data(season_tuple, selected_team)
 
-if selected_team:
-    filtered = filtered[
-        (filtered["home_team_full_name"] == selected_team) | 
-        (filtered["visitor_team_full_name"] == selected_team)
-    ]
+# Les filtres saison / équipe sont déjà appliqués à la lecture par load_data
+filtered = df
 
 # Calcul des indicateurs
-team_games = filtered.copy()
+team_games = filtered
 
 home_games = team_games[team_games["home_team_full_name"] == selected_team]
 visitor_games = team_games[team_games["visitor_team_full_name"] == selected_team]
@@ -88,20 +109,20 @@ with tab_resume:
     if team_games.empty:
         st.warning("Aucun match ne correspond aux filtres sélectionnés.")
     else:
-        plot_df = team_games.copy()
-
-        def compute_points(row):
-            if row["home_team_full_name"] == selected_team:
-                return row["home_team_score"]
-            else:
-                return row["visitor_team_score"]
-
-        plot_df["points_scored"] = plot_df.apply(compute_points, axis=1)
-        plot_df = plot_df.sort_values("date")
+        # Points marqués par l'équipe sélectionnée (domicile ou extérieur) :
+        # seules la date et cette série sont passées au graphique
+        mask = team_games["home_team_full_name"].to_numpy() == selected_team
+        points_scored = np.where(
+            mask,
+            team_games["home_team_score"].to_numpy(),
+            team_games["visitor_team_score"].to_numpy(),
+        )
+        dates = team_games["date"].to_numpy(dtype="datetime64[D]")
+        order = np.argsort(dates, kind="stable")
 
         st.subheader("Évolution des points marqués")
         st.line_chart(
-            plot_df.set_index("date")["points_scored"]
+            pd.Series(points_scored[order], index=dates[order], name="points_scored")
         )
 
 with tab_details:
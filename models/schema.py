@@ -20,6 +20,7 @@ Remarque : ce module est compatible avec Pydantic v2 (utilise `model_validator`
 from typing import Optional, Annotated
 from datetime import date, datetime
 from pydantic import BaseModel, Field, ConfigDict, model_validator
+from pydantic_core import PydanticCustomError
 
 
 # ---- Équipe
@@ -59,7 +60,7 @@ class Game(BaseModel):
 
     Validation personnalisée :
         - `check_team_different` : s'assure que les deux équipes ne sont pas
-          identiques (même id), sinon lève une `ValueError`.
+          identiques (même id), sinon lève une erreur de type `same_team`.
     """
 
     # Obligatoires
@@ -105,9 +106,11 @@ class Game(BaseModel):
     def check_team_different(self):
         """Validator exécuté après parsing : interdit les mêmes équipes.
 
-        Lève ValueError si `home_team.id == visitor_team.id`.
-        Retourne `self` sinon (nécessaire pour `mode='after'`).
+        Lève une `PydanticCustomError` de type `same_team` si
+        `home_team.id == visitor_team.id`, ce qui permet de classer l'erreur
+        via `e.errors()` sans analyser le message. Retourne `self` sinon
+        (nécessaire pour `mode='after'`).
         """
         if self.home_team.id == self.visitor_team.id:
-            raise ValueError("Home and visitor team cannot be identical")
+            raise PydanticCustomError("same_team", "Home and visitor team cannot be identical")
         return self
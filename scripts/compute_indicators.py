@@ -1,50 +1,108 @@
+import numpy as np
 import pandas as pd
+import pyarrow.dataset as ds
+from numba import njit, prange, get_num_threads
 import glob, json, os
 
 
+@njit(parallel=True, cache=True)
+def aggregate_teams(codes_h, codes_v, hs, vs, home_win, visitor_win, n_teams, n_chunks):
+    """Agrège en une passe les points et victoires par équipe et par côté.
+
+    Les lignes sont découpées en `n_chunks` blocs (un par thread) ; chaque bloc
+    remplit ses propres tableaux locaux (pas d'opération atomique), réduits à
+    la fin. Les tableaux renvoyés ont la forme
+    `(2, n_teams)` : ligne 0 = domicile, ligne 1 = extérieur.
+
+    Returns:
+        tuple: (points marqués, points encaissés, matchs, victoires).
+    """
+    n = codes_h.shape[0]
+    chunk = (n + n_chunks - 1) // n_chunks
+    local = np.zeros((n_chunks, 4, 2, n_teams), dtype=np.int64)
+
+    for c in prange(n_chunks):
+        for i in range(c * chunk, min((c + 1) * chunk, n)):
+            h = codes_h[i]
+            v = codes_v[i]
+            local[c, 0, 0, h] += hs[i]
+            local[c, 1, 0, h] += vs[i]
+            local[c, 2, 0, h] += 1
+            local[c, 3, 0, h] += home_win[i]
+            local[c, 0, 1, v] += vs[i]
+            local[c, 1, 1, v] += hs[i]
+            local[c, 2, 1, v] += 1
+            local[c, 3, 1, v] += visitor_win[i]
+
+    totals = local.sum(axis=0)
+    return totals[0], totals[1], totals[2], totals[3]
+
+
 os.makedirs("data/indicators", exist_ok=True)
 files = glob.glob("data/clean/games_*clean.parquet")
 
-dfs = [pd.read_parquet(p) for p in files]
+# Seules les colonnes utiles aux indicateurs sont lues
+COLUMNS = [
+    "home_team_full_name",
+    "visitor_team_full_name",
+    "home_team_score",
+    "visitor_team_score",
+]
 
-df = pd.concat(dfs, ignore_index=True)
+# Un seul scan Arrow sur tous les fichiers, converti une fois en DataFrame
+table = ds.dataset(files, format="parquet").to_table(columns=COLUMNS)
+df = table.to_pandas(types_mapper=pd.ArrowDtype)
 
 print(df.head())
 
-df["home_win"] = df["home_team_score"] > df["visitor_team_score"]
-df["visitor_win"] = df["visitor_team_score"] > df["home_team_score"]
+# Catégories d'équipes partagées entre domicile et extérieur : les codes
+# entiers servent d'index direct dans le noyau d'agrégation
+team_dtype = pd.CategoricalDtype(
+    sorted(set(df["home_team_full_name"].unique()) | set(df["visitor_team_full_name"].unique()))
+)
+teams = team_dtype.categories
+df["home_team_full_name"] = df["home_team_full_name"].astype(team_dtype)
+df["visitor_team_full_name"] = df["visitor_team_full_name"].astype(team_dtype)
+codes_h = df["home_team_full_name"].cat.codes.to_numpy()
+codes_v = df["visitor_team_full_name"].cat.codes.to_numpy()
+
+# Victoires calculées à partir d'un seul écart de score, sans colonnes ajoutées au DataFrame.
+# Les scores gardent leur largeur stockée (int16) ; le noyau accumule en int64.
+hs = df["home_team_score"].to_numpy()
+vs = df["visitor_team_score"].to_numpy()
+diff = hs - vs
+home_win = diff > 0
+visitor_win = diff < 0
+
+points_for, points_against, games, nb_wins = aggregate_teams(
+    codes_h, codes_v, hs, vs, home_win, visitor_win, len(teams), get_num_threads()
+)
+# Moyennes par côté (ligne 0 = domicile, ligne 1 = extérieur)
+mean_for = points_for / games
+mean_against = points_against / games
 
 # Moyenne de point marquer par équipe à domicile et à l'extérieur
-avg_points = df.groupby("home_team_full_name")["home_team_score"].mean().sort_values(ascending=False)
+avg_points = pd.Series(mean_for[0], index=teams).sort_values(ascending=False)
 print("Moyenne des points à domicile par équipe (top 10) :")
 print(avg_points.head(10))
-avg_points_visitor = df.groupby("visitor_team_full_name")["visitor_team_score"].mean().sort_values(ascending=False)
+avg_points_visitor = pd.Series(mean_for[1], index=teams).sort_values(ascending=False)
 print("\nMoyenne des points à l'extérieur par équipe (top 10) :")
 print(avg_points_visitor.head(10))
 
 
 # Meilleur attaque 
-best_attacks = (
-    df.groupby("home_team_full_name")["home_team_score"].mean()
-    + df.groupby("visitor_team_full_name")["visitor_team_score"].mean()
-).sort_values(ascending=False)
+best_attacks = pd.Series(mean_for.sum(axis=0), index=teams).sort_values(ascending=False)
 
 print("\nMoyenne des points à domicile par équipe (top 10) :")
 print(best_attacks.head(10))
 
 # Meilleur défense
-best_defenses = (
-    df.groupby("home_team_full_name")["visitor_team_score"].mean()
-    + df.groupby("visitor_team_full_name")["home_team_score"].mean()
-).sort_values()
+best_defenses = pd.Series(mean_against.sum(axis=0), index=teams).sort_values()
 print("\nMeilleure défense (points encaissés en moyenne, bas = mieux) :")
 print(best_defenses.head(10))
 
 # Victoire par équipe
-wins = (
-    df.groupby("home_team_full_name")["home_win"].sum()
-    + df.groupby("visitor_team_full_name")["visitor_win"].sum()
-).sort_values(ascending=False)
+wins = pd.Series(nb_wins.sum(axis=0), index=teams).sort_values(ascending=False)
 
 report = {
     "best_attacks": best_attacks.head(10).to_dict(),
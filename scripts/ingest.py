@@ -1,11 +1,16 @@
 """Script d'ingestion des matches depuis l'API `balldontlie`.
 
 Ce script récupère, page par page, les matches pour les saisons listées dans
-`SEASONS` et écrit les résultats bruts (JSON) dans `data/raw/games_<season>.json`.
+`SEASONS` et écrit les résultats bruts (NDJSON : un match JSON par ligne) dans
+`data/raw/games_<season>.json`.
 
 Comportement et bonnes pratiques :
-    - Respect des limites de l'API : le script pause 12 secondes entre pages et
-        gère le code HTTP 429 (Too Many Requests).
+    - Les saisons sont récupérées en parallèle (asyncio + aiohttp) avec une
+        seule session HTTP.
+    - Respect des limites de l'API : un limiteur global garantit au plus une
+        requête toutes les 12 secondes, toutes saisons confondues ; pendant
+        qu'une saison attend, une autre peut utiliser le créneau suivant. Le
+        code HTTP 429 (Too Many Requests) est géré.
     - Limitation de pages : `MAX_PAGES` protège contre des boucles infinies si
         l'API renvoie un curseur indéfiniment.
     - Le header Authorization est actuellement présent dans `headers` — considère
@@ -14,15 +19,11 @@ Comportement et bonnes pratiques :
 
 Usage : lancer depuis la racine du dépôt :
     python scripts/ingest.py
-
-Remarque : ce script s'exécute directement lorsqu'il est importé. Si tu veux
-l'utiliser comme module, ajouter un `main()` et le garde
-`if __name__ == '__main__'` (je peux le faire si tu veux).
 """
 
-import requests
-import json
-import time
+import aiohttp
+import asyncio
+import orjson
 import os
 
 
@@ -36,71 +37,110 @@ headers = {"Authorization": "214925d6-ddeb-48fe-af81-f3c27b3a56af"}
 SEASONS = [2020, 2021, 2022, 2023, 2024]
 MAX_PAGES = 60
 
+# Délai minimal entre deux requêtes vers l'API (toutes saisons confondues)
+RATE_LIMIT_SECONDS = 12
 
-# Répertoires de sortie
-os.makedirs("data/raw", exist_ok=True)
 
+class RateLimiter:
+    """Limiteur de débit partagé entre les tâches asyncio.
 
-for years in SEASONS:
-        """Boucle d'ingestion par saison.
+    `acquire()` attend que `interval` secondes se soient écoulées depuis le
+    créneau précédemment accordé, quelle que soit la saison qui l'a pris.
+    """
 
-        Pour chaque saison :
-            - on récupère la première page,
-            - on itère ensuite tant que l'API renvoie un `next_cursor` et que la
-                limite de pages n'est pas atteinte,
-            - on respecte un délai entre les pages pour éviter d'être bloqué.
-        """
-        page = 1
-        params = {"per_page": 100, "seasons[]": years}
-        all_games = []
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = asyncio.Lock()
+        self._next_slot = 0.0
 
-        output_path = f"data/raw/games_{years}.json"
+    async def acquire(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            wait = self._next_slot - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_slot = max(now, self._next_slot) + self.interval
 
-        # Première requête (sans curseur)
-        resp = requests.get(url, headers=headers, params=params)
 
-        # Si on a dépassé le rate limit côté serveur, attendre et ré-essayer une fois
-        if resp.status_code == 429:
-                time.sleep(12)
-                resp = requests.get(url, headers=headers, params=params)
+async def fetch_page(session, limiter, params):
+    """Récupère une page de l'API après avoir obtenu un créneau du limiteur.
 
+    Returns:
+        dict | None: le JSON de la page, ou `None` si l'API a répondu 429.
+    """
+    await limiter.acquire()
+    async with session.get(url, params=params) as resp:
+        if resp.status == 429:
+            return None
         resp.raise_for_status()
-        payload = resp.json()
+        return await resp.json()
+
+
+async def fetch_season(years, session, limiter):
+    """Ingestion d'une saison.
+
+    Pour chaque saison :
+        - on récupère la première page,
+        - on itère ensuite tant que l'API renvoie un `next_cursor` et que la
+            limite de pages n'est pas atteinte,
+        - chaque requête passe par le limiteur global pour éviter d'être bloqué.
+    """
+    page = 1
+    params = {"per_page": 100, "seasons[]": years}
+    all_games = []
+
+    output_path = f"data/raw/games_{years}.json"
+
+    # Première requête (sans curseur)
+    payload = await fetch_page(session, limiter, params)
+
+    # Si on a dépassé le rate limit côté serveur, attendre et ré-essayer une fois
+    if payload is None:
+        await asyncio.sleep(RATE_LIMIT_SECONDS)
+        payload = await fetch_page(session, limiter, params)
+        if payload is None:
+            raise RuntimeError(f"Saison={years} : rate limit toujours dépassé (HTTP 429)")
+
+    page_items = payload.get('data', [])
+    cursor = payload.get("meta", {}).get("next_cursor")
+
+    all_games.extend(page_items)
+    print(f"Saison={years} page {page} count={len(page_items)} next_cursor={cursor} total_games={len(all_games)}")
+
+    # Pagination suivante
+    while cursor and page < MAX_PAGES:
+        page += 1
+        params = {"per_page": 100, "seasons[]": years, "cursor": cursor}
+        payload = await fetch_page(session, limiter, params)
+
+        if payload is None:
+            print(f"⚠️ Saison={years} trop de requêtes — pause de {RATE_LIMIT_SECONDS} secondes...")
+            await asyncio.sleep(RATE_LIMIT_SECONDS)
+            continue
 
         page_items = payload.get('data', [])
-        cursor = payload.get("meta", {}).get("next_cursor")
+        if not page_items:
+            print(f"⚠️ Saison={years} page vide reçue, arrêt propre.")
+            break
 
+        cursor = payload.get("meta", {}).get("next_cursor")
         all_games.extend(page_items)
-        print(f"Saison={years} page {page} count={len(page_items)} next_cursor={cursor} total_games={len(all_games)}")
-
-        # Pagination suivante
-        while cursor and page < MAX_PAGES:
-                page += 1
-                params = {"per_page": 100, "seasons[]": years, "cursor": cursor}
-                resp = requests.get(url, headers=headers, params=params)
-
-                if resp.status_code == 429:
-                        print("⚠️ Trop de requêtes — pause de 12 secondes...")
-                        time.sleep(12)
-                        continue
-
-                resp.raise_for_status()
-                payload = resp.json()
-
-                page_items = payload.get('data', [])
-                if not page_items:
-                        print("⚠️ Page vide reçue, arrêt propre.")
-                        break
-
-                cursor = payload.get("meta", {}).get("next_cursor")
-                all_games.extend(page_items)
-                print(f"Saison={years} page={page} count={len(page_items)} next_cursor={cursor} total_games={len(all_games)}")
-
-                # Pause courte pour respecter les limites de l'API
-                print("⏳ Attente de 12 secondes avant la prochaine page...")
-                time.sleep(12)
-
-        # Écrire le fichier JSON brut pour la saison
-        with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(all_games, f, indent=2, ensure_ascii=False)
-        print(f"SUMMARY season={years} pages={page} games={len(all_games)} file={output_path}")
+        print(f"Saison={years} page={page} count={len(page_items)} next_cursor={cursor} total_games={len(all_games)}")
+
+    # Écrire le fichier brut pour la saison (NDJSON compact : un match par ligne)
+    with open(output_path, "wb") as f:
+        f.writelines(orjson.dumps(g) + b"\n" for g in all_games)
+    print(f"SUMMARY season={years} pages={page} games={len(all_games)} file={output_path}")
+
+
+async def main():
+    # Répertoires de sortie
+    os.makedirs("data/raw", exist_ok=True)
+
+    limiter = RateLimiter(RATE_LIMIT_SECONDS)
+    async with aiohttp.ClientSession(headers=headers) as session:
+        await asyncio.gather(*[fetch_season(y, session, limiter) for y in SEASONS])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,9 +4,12 @@ Ce script lit des fichiers JSON bruts (données de matches), valide chaque
 enregistrement avec le modèle `schema.Game` (Pydantic), écrit les enregistrements
 valides dans `data/validated/` et consigne les erreurs dans `data/errors/`.
 
-Ensuite, il agrège les fichiers validés pour produire des fichiers "clean"
-au format Parquet dans `data/clean/` et génère un rapport de qualité dans
-`data/reports/`.
+Les enregistrements validés sont aussi aplatis et écrits directement en
+fichiers "clean" au format Parquet dans `data/clean/`. Pour le dashboard, le
+script produit également le dataset `data/clean/team_games_long/` (une ligne
+par équipe et par match, partitionné par équipe) et `data/clean/_meta.json`
+(saisons et équipes disponibles). Il génère enfin un rapport de qualité unique
+dans `data/reports/quality_report.json`.
 
 Usage (à lancer depuis la racine du projet) :
   python scripts/validate.py
@@ -17,9 +20,15 @@ Remarques :
   - Les fichiers d'entrée attendus sont listés dans la variable `files`.
 """
 
-from pydantic import ValidationError
-import pandas as pd
-import sys, os, json
+from pydantic import TypeAdapter, ValidationError
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import ijson
+import orjson
+import sys, os, json, shutil
 
 # Ajouter la racine du projet au PYTHONPATH pour importer `models`.
 # Cela évite les erreurs `ModuleNotFoundError` si le script est lancé via
@@ -38,14 +47,39 @@ files = [
 ]
 
 
-# Créer les dossiers de sortie si nécessaire
-os.makedirs("data/validated", exist_ok=True)
-os.makedirs("data/errors", exist_ok=True)
-os.makedirs("data/clean", exist_ok=True)
+# Taille du buffer des fichiers de sortie et nombre de matchs validés par lot
+WRITE_BUFFER = 1 << 20
+BATCH_SIZE = 1000
 
+# Dataset Parquet "une ligne par (équipe, match)", partitionné par équipe
+TEAM_GAMES_LONG = "data/clean/team_games_long"
 
-# Compteurs globaux d'erreurs rencontrées pendant la validation
-counters = {"invalid_schema": 0, "same_team": 0}
+# Saisons et équipes disponibles, pour les filtres du dashboard
+META_PATH = "data/clean/_meta.json"
+
+# Rapport qualité global (toutes saisons)
+QUALITY_REPORT_PATH = "data/reports/quality_report.json"
+
+# Validateur Pydantic d'une liste de matchs (un seul appel par lot)
+GAMES_TA = TypeAdapter(list[schema.Game])
+
+# Schéma Arrow explicite des fichiers "clean" (colonnes produites par `flatten`).
+# Les noms d'équipes, à faible cardinalité, sont encodés en dictionnaire ;
+# scores et période utilisent les entiers les plus étroits adaptés (score < 32767).
+CLEAN_SCHEMA = pa.schema([
+    ("game_id", pa.int64()),
+    ("date", pa.date32()),
+    ("season", pa.int16()),
+    ("status", pa.string()),
+    ("periode", pa.int8()),
+    ("postseason", pa.bool_()),
+    ("home_team_id", pa.int64()),
+    ("home_team_full_name", pa.dictionary(pa.int32(), pa.string())),
+    ("home_team_score", pa.int16()),
+    ("visitor_team_id", pa.int64()),
+    ("visitor_team_full_name", pa.dictionary(pa.int32(), pa.string())),
+    ("visitor_team_score", pa.int16()),
+])
 
 
 def flatten(rec: dict) -> dict:
@@ -53,11 +87,11 @@ def flatten(rec: dict) -> dict:
 
     Le modèle Pydantic stocke des objets imbriqués pour les équipes; cette
     fonction extrait les champs utiles dans une structure plate adaptée à
-    la conversion en DataFrame / Parquet.
+    la conversion en table Arrow / Parquet.
 
     Args:
-        rec: dictionnaire JSON représentant un match (tel que produit par
-             `schema.Game.model_dump_json()` et rechargé via `json.loads`).
+        rec: dictionnaire représentant un match validé (tel que produit par
+             `schema.Game.model_dump()`).
 
     Returns:
         dict: dictionnaire plat contenant des colonnes clés (game_id, date,
@@ -82,85 +116,218 @@ def flatten(rec: dict) -> dict:
     }
 
 
-for file in files:
-    # Boucle principale : traiter chaque fichier de saison
+def team_games_long(table: pa.Table) -> pa.Table:
+    """Construit la table longue "une ligne par (équipe, match)".
+
+    Chaque match apparaît deux fois : côté domicile puis côté extérieur, avec
+    les colonnes `team`, `points_for`, `points_against` et `is_home` ajoutées
+    aux colonnes "clean". La table est triée par équipe puis par date.
+
+    Args:
+        table: table Arrow au schéma `CLEAN_SCHEMA`.
+
+    Returns:
+        pa.Table: table longue, deux fois plus de lignes que `table`.
+    """
+    sides = []
+    for team, points_for, points_against, is_home in (
+        ("home_team_full_name", "home_team_score", "visitor_team_score", True),
+        ("visitor_team_full_name", "visitor_team_score", "home_team_score", False),
+    ):
+        sides.append(
+            table.append_column("team", table[team].cast(pa.string()))
+            .append_column("points_for", table[points_for])
+            .append_column("points_against", table[points_against])
+            .append_column("is_home", pa.repeat(is_home, table.num_rows))
+        )
+    return pa.concat_tables(sides).sort_by([("team", "ascending"), ("date", "ascending")])
+
+
+def iter_games(f):
+    """Itère sur les matchs bruts d'un fichier ouvert en binaire.
+
+    Accepte le format NDJSON écrit par `ingest.py` (un match par ligne) ainsi
+    que l'ancien format tableau JSON, lu en flux avec `ijson`.
+
+    Args:
+        f: fichier source ouvert en mode `"rb"`.
+
+    Yields:
+        dict: un match brut.
+    """
+    head = f.read(1)
+    while head.isspace():
+        head = f.read(1)
+    f.seek(-len(head), os.SEEK_CUR)
+
+    if head == b"[":
+        yield from ijson.items(f, "item", use_float=True)
+    else:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
+
+
+def validate_batch(batch: list) -> tuple[list, list]:
+    """Valide un lot de matchs bruts en un seul appel Pydantic.
+
+    Le lot complet passe par `GAMES_TA` (cœur Rust de Pydantic). En cas
+    d'erreur, seuls les indices signalés par `e.errors()` sont revalidés un par
+    un pour isoler leur message ; les autres sont revalidés ensemble.
+
+    Args:
+        batch: liste de dictionnaires JSON bruts (un par match).
+
+    Returns:
+        tuple: (liste de `schema.Game` valides, liste de couples
+               `(match brut, ValidationError)`).
+    """
+    try:
+        return GAMES_TA.validate_python(batch), []
+    except ValidationError as e:
+        bad = {err["loc"][0] for err in e.errors()}
+
+    games = GAMES_TA.validate_python([g for i, g in enumerate(batch) if i not in bad])
+
+    failures = []
+    for i in sorted(bad):
+        try:
+            schema.Game.model_validate(batch[i])
+        except ValidationError as err:
+            failures.append((batch[i], err))
+    return games, failures
+
+
+def process_season(file: str) -> tuple[int, dict, pa.Table]:
+    """Valide un fichier brut de saison et écrit ses sorties.
+
+    Écrit `data/validated/games_<year>_validated.json`,
+    `data/errors/games_<year>_errors.json` et
+    `data/clean/games_<year>_clean.parquet`. Les saisons étant indépendantes,
+    la fonction est exécutée dans un processus séparé par saison.
+
+    Args:
+        file: chemin du fichier brut (ex: `data/raw/games_2020.json`).
+
+    Returns:
+        tuple: (année, compteurs d'erreurs de la saison, table "clean").
+    """
     print(f"Processing file: {file}")
 
     # Extraire l'année depuis le nom du fichier (ex: games_2020.json)
     year = int(os.path.basename(file).split("_")[1].split(".")[0])
+    season_counters = {"invalid_schema": 0, "same_team": 0}
 
     # Chemins de sortie pour cette saison
     valid = f"data/validated/games_{year}_validated.json"
     errors = f"data/errors/games_{year}_errors.json"
 
-    # Charger le JSON source
-    with open(file, "r", encoding="utf-8") as f:
-        games_data = json.load(f)
-
-    # Valider chaque enregistrement via le modèle Pydantic
-    for game in games_data:
-        try:
-            g = schema.Game.model_validate(game)
-            # Écrire l'enregistrement validé en JSON ligne par ligne
-            with open(valid, "a", encoding="utf-8") as vf:
-                vf.write(g.model_dump_json() + "\n")
-        except ValidationError as e:
-            # Classifier les erreurs pour rapport
-            msg = str(e)
-            if "Home and visitor teams cannot be identical" in msg:
-                counters["same_team"] += 1
-                err_type = "same_team"
-            else:
-                counters["invalid_schema"] += 1
-                err_type = "invalid_schema"
-
-            er_s = {
-                "type": err_type,
-                "game_id_hint": game.get("id"),
-                "season": game.get("season"),
-                "reason": msg[:300],
-            }
-            # Journaliser l'erreur
-            with open(errors, "a", encoding="utf-8") as f:
-                f.write(json.dumps(er_s, ensure_ascii=False) + "\n")
-            continue
-
-
-# Liste des fichiers validés attendus (une par saison)
-validate_file = [f"data/validated/games_{year}_validated.json" for year in range(2020, 2025)]
-
-for path in validate_file:
-    # Si le fichier validé n'existe pas, on passe la génération "clean"
-    if not os.path.exists(path):
-        print(f"File {path} does not exist, skipping clean generation.")
-        continue
-
-    year = int(os.path.basename(path).split("_")[1])
-    row = []
-
-    # Recharger les JSON ligne par ligne puis aplatir
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            rec = json.loads(line)
-            row.append(flatten(rec))
-
-    # Construire DataFrame et écrire Parquet
-    df = pd.DataFrame(row)
+    # Lire le JSON source en flux, par lots de BATCH_SIZE matchs, sans charger
+    # le fichier complet. Les sorties sont ouvertes une seule fois par saison
+    # ("w" : une relance n'accumule pas de doublons).
+    with open(file, "rb") as f, \
+            open(valid, "wb", buffering=WRITE_BUFFER) as vf, \
+            open(errors, "wb", buffering=WRITE_BUFFER) as ef:
+        games_iter = iter_games(f)
+        rows = []
+
+        while batch := list(islice(games_iter, BATCH_SIZE)):
+            games, failures = validate_batch(batch)
+
+            for g in games:
+                rec = g.model_dump()
+                # Écrire l'enregistrement validé en JSON ligne par ligne (NDJSON compact)
+                vf.write(orjson.dumps(rec, option=orjson.OPT_UTC_Z) + b"\n")
+                # Ligne aplatie pour le Parquet, directement depuis le modèle
+                rows.append(flatten(rec))
+
+            error_lines = []
+            for game, e in failures:
+                # Classifier les erreurs pour rapport (type structuré de l'erreur)
+                if any(err["type"] == "same_team" for err in e.errors()):
+                    season_counters["same_team"] += 1
+                    err_type = "same_team"
+                else:
+                    season_counters["invalid_schema"] += 1
+                    err_type = "invalid_schema"
+
+                er_s = {
+                    "type": err_type,
+                    "game_id_hint": game.get("id"),
+                    "season": game.get("season"),
+                    "reason": str(e)[:300],
+                }
+                error_lines.append(orjson.dumps(er_s) + b"\n")
+
+            # Journaliser les erreurs du lot
+            ef.writelines(error_lines)
+
+    # Construire la table Arrow et écrire Parquet, sans relire le JSON validé
+    table = pa.Table.from_pylist(rows, schema=CLEAN_SCHEMA)
     outpath = f"data/clean/games_{year}_clean.parquet"
-    df.to_parquet(outpath, index=False)
-
-    # Rapport qualité pour cette saison
-    os.makedirs("data/reports", exist_ok=True)
-
+    # zstd + row groups dimensionnés pour que les statistiques Parquet
+    # permettent de filtrer à la lecture
+    pq.write_table(table, outpath, compression="zstd", row_group_size=100_000)
+    return year, season_counters, table
+
+
+def main():
+    # Créer les dossiers de sortie si nécessaire
+    os.makedirs("data/validated", exist_ok=True)
+    os.makedirs("data/errors", exist_ok=True)
+    os.makedirs("data/clean", exist_ok=True)
+
+    # Une saison par processus : validation Pydantic, aplatissement et écriture
+    # Parquet s'exécutent en parallèle (fichiers de sortie distincts)
+    with ProcessPoolExecutor(max_workers=len(files)) as ex:
+        results = list(ex.map(process_season, files))
+
+    # Compteurs globaux d'erreurs rencontrées pendant la validation
+    counters = {"invalid_schema": 0, "same_team": 0}
+    # Tables "clean" de chaque saison, réutilisées pour la table longue par équipe
+    season_tables = []
+    for _, season_counters, table in results:
+        for key, value in season_counters.items():
+            counters[key] += value
+        season_tables.append(table)
+
+    # Table longue (équipe, match) toutes saisons confondues, partitionnée par équipe.
+    # Le dossier est recréé à chaque exécution pour ne pas garder d'anciens fichiers.
+    if season_tables:
+        long_table = team_games_long(pa.concat_tables(season_tables))
+        shutil.rmtree(TEAM_GAMES_LONG, ignore_errors=True)
+        pq.write_to_dataset(
+            long_table,
+            TEAM_GAMES_LONG,
+            partition_cols=["team"],
+            basename_template="part-{i}.parquet",
+            compression="zstd",
+        )
+
+        # Métadonnées du dashboard (options des filtres), lues sans scanner les données
+        meta = {
+            "seasons": sorted(pc.unique(long_table["season"]).to_pylist()),
+            "teams": sorted(pc.unique(long_table["team"]).to_pylist()),
+        }
+        with open(META_PATH, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    # Rapport qualité unique pour toutes les saisons, écrit une seule fois
+    valid_years = {
+        y for y in range(2020, 2025)
+        if os.path.exists(f"data/validated/games_{y}_validated.json")
+    }
     quality_report = {
-        "total_valid": sum(
-            1
-            for year in range(2020, 2025)
-            if os.path.exists(f"data/validated/games_{year}_validated.json")
-        ),
+        "total_valid": len(valid_years),
+        "valid_seasons": sorted(valid_years),
         "error_counts": counters,
+        "error_counts_by_season": {str(year): c for year, c, _ in results},
     }
 
-    with open(f"data/reports/games_{year}_quality_report.json", "w", encoding="utf-8") as f:
+    os.makedirs("data/reports", exist_ok=True)
+    with open(QUALITY_REPORT_PATH, "w", encoding="utf-8") as f:
         json.dump(quality_report, f, ensure_ascii=False, indent=2)
 
+
+if __name__ == "__main__":
+    main()